@@ -0,0 +1,506 @@
+# bench.py - Performance benchmarks for rendering, parsing and refresh latency
+#
+# Runs on Linux CPython with an emulated LCD bus and network, or on the Pico:
+#   python3 bench.py [--output FILE] [--baseline FILE] [--save-baseline]
+#                    [--records N] [--budget-ms N] [--hardware]
+#   >>> import bench; bench.run()
+import sys
+import io
+import json
+import time
+
+try:
+    _ticks_us = time.ticks_us
+    _ticks_diff = time.ticks_diff
+except AttributeError:  # Host (CPython)
+    def _ticks_us():
+        return int(time.perf_counter() * 1000000)
+
+    def _ticks_diff(a, b):
+        return a - b
+
+CORE_MODULES = ("config", "lcd_simple", "display_manager", "port_data", "port_sim",
+                "snapshot", "http_stream", "ship_merge", "deadline")
+# Modules an offline dashboard should never load
+NETWORK_MODULES = ("network", "urequests", "ssl", "http_stream", "ship_merge", "snapshot")
+
+DEFAULT_OUTPUT = "bench_results.json"
+DEFAULT_BASELINE = "bench_baseline.json"
+TOLERANCE = 0.10  # Allowed change against the baseline before it counts as a regression
+NOISE_MS = 20     # Timing changes smaller than this are never reported
+REPEATS = 5       # Timed runs per throughput metric, after one warm-up run
+
+# Fixed port data so every run renders exactly the same frames
+SAMPLE_DATA = {
+    "total_ships": 172, "inbound": 18, "outbound": 14, "anchored": 9, "moored": 131,
+    "largest_ship": "MSC IRINA", "largest_dwt": 232618,
+    "focus_ship": "COSCO SHIPPING UNIVERSE", "focus_destination": "SINGAPORE",
+    "focus_status": "INBOUND", "focus_eta": "14:35", "terminal": "MAASVLAKTE",
+    "weather": "PartlyCldy 14.2°C", "wind": "21.6 km/h",
+    "activity_level": "HIGH", "port_status": "BUSY", "data_source": "REAL",
+    "freshness": {"weather": 0, "ships": 0}
+}
+
+def _silent(*args, **kwargs):
+    pass
+
+def _quiet():
+    """Silence the data modules' progress output while they are measured"""
+    for name in ("port_data", "port_sim"):
+        if name in sys.modules:
+            sys.modules[name].print = _silent
+
+class VirtualClock:
+    """Stands in for the time module of the display code.
+
+    Sleeps are added to the clock instead of blocking, so a view that would
+    dwell for seconds renders instantly while still being timed correctly.
+    """
+
+    def __init__(self):
+        self.start = _ticks_us()
+        self.slept_us = 0
+
+    def sleep_ms(self, ms):
+        self.slept_us += int(ms * 1000)
+
+    def sleep_us(self, us):
+        self.slept_us += int(us)
+
+    def sleep(self, s):
+        self.slept_us += int(s * 1000000)
+
+    def now_us(self):
+        return _ticks_diff(_ticks_us(), self.start) + self.slept_us
+
+class CountingI2C:
+    """Counts the bytes written to the LCD, on a real bus or an emulated one"""
+
+    def __init__(self, clock, i2c=None, freq=400000):
+        self.clock = clock
+        self.i2c = i2c
+        self.freq = freq
+        self.writes = 0
+        self.bytes = 0
+        self.first_data_us = None
+
+    def writeto(self, addr, buf):
+        self.writes += 1
+        self.bytes += len(buf)
+        if self.first_data_us is None and buf[0] & 0x01:
+            # RS bit set: the first character reaching the display
+            self.first_data_us = self.clock.now_us()
+        if self.i2c:
+            self.i2c.writeto(addr, buf)
+        else:
+            # Start + address + 9 bits per byte + stop on the emulated bus
+            self.clock.slept_us += (11 + 9 * len(buf)) * 1000000 // self.freq
+
+def _emulate_machine():
+    """Install a stand-in machine module so the LCD driver imports on a host"""
+    try:
+        import machine
+    except ImportError:
+        class _Peripheral:
+            IN = OUT = PULL_UP = IRQ_FALLING = 0
+
+            def __init__(self, *args, **kwargs):
+                pass
+
+        machine = type(sys)("machine")
+        machine.Pin = _Peripheral
+        machine.I2C = _Peripheral
+        sys.modules["machine"] = machine
+
+class _FakeResponse:
+    def __init__(self, status_code, body=b"", headers=None):
+        self.status_code = status_code
+        self.content = body
+        self.raw = io.BytesIO(body)
+        self.headers = headers or {}
+
+    @property
+    def text(self):
+        return str(self.content, "utf-8")
+
+    def close(self):
+        pass
+
+class FakeNetwork:
+    """urequests stand-in serving recorded fixtures with a configurable delay or failure"""
+
+    def __init__(self, routes):
+        self.routes = routes  # url fragment -> (body, headers)
+        self.delay_s = 0
+        self.fail = False
+        self.calls = 0
+
+    def get(self, url, headers=None, timeout=None):
+        self.calls += 1
+        wait = self.delay_s if timeout is None else min(self.delay_s, timeout)
+        if wait:
+            time.sleep(wait)
+        if self.fail or (timeout is not None and self.delay_s > timeout):
+            raise OSError(110)  # ETIMEDOUT
+        for fragment, (body, response_headers) in self.routes.items():
+            if fragment in url:
+                return _FakeResponse(200, body, response_headers)
+        return _FakeResponse(404)
+
+def _install_network(fake):
+    previous = sys.modules.get("urequests")
+    sys.modules["urequests"] = fake
+    return previous
+
+def _restore_network(previous):
+    if previous is None:
+        sys.modules.pop("urequests", None)
+    else:
+        sys.modules["urequests"] = previous
+
+def ais_fixture(records):
+    """Deterministic AIS Hub style payload: [header, [records...]]"""
+    ships = []
+    for i in range(records):
+        ships.append({
+            "MMSI": 244000000 + i,
+            "TIME": "2024-05-08 10:%02d:%02d GMT" % (i // 60 % 60, i % 60),
+            "LONGITUDE": 4.2 + (i % 50) * 0.01,
+            "LATITUDE": 51.7 + (i % 40) * 0.01,
+            "COG": i % 360, "SOG": (i % 150) / 10, "HEADING": i % 360,
+            "NAVSTAT": i % 9, "IMO": 9000000 + i, "NAME": "VESSEL %d" % i,
+            "CALLSIGN": "PD%04d" % i, "TYPE": 70 + i % 20,
+            "DEST": ("ROTTERDAM", "ANTWERP", "HAMBURG")[i % 3],
+            "ETA": "05-09 12:00", "DRAUGHT": 8.5
+        })
+    return json.dumps([{"ERROR": False, "FORMAT": "HUMAN", "RECORDS": records}, ships]).encode()
+
+WEATHER_FIXTURE = json.dumps({
+    "current": {"temperature_2m": 14.2, "weather_code": 2, "wind_speed_10m": 21.6}
+}).encode()
+
+def _gzip(body):
+    """gzip-compress a fixture, or None where no compressor is available"""
+    try:
+        import zlib
+        if hasattr(zlib, "compressobj"):
+            comp = zlib.compressobj(9, zlib.DEFLATED, 31)
+            return comp.compress(body) + comp.flush()
+    except ImportError:
+        pass
+    try:
+        import deflate
+        out = io.BytesIO()
+        with deflate.DeflateIO(out, deflate.GZIP) as stream:
+            stream.write(body)
+        return out.getvalue()
+    except Exception:
+        return None
+
+def _throughput(metrics, spread, name, amount, fn, repeats=REPEATS):
+    """Record amount per microsecond of fn as the median of several timed runs.
+
+    One untimed warm-up run comes first. The relative spread of the runs,
+    (fastest - slowest) / median, is recorded too so compare() can allow
+    for it.
+    """
+    fn()
+    rates = []
+    for _ in range(repeats):
+        start = _ticks_us()
+        fn()
+        rates.append(amount / max(1, _ticks_diff(_ticks_us(), start)))
+    rates.sort()
+    median = rates[len(rates) // 2]
+    metrics[name] = median
+    spread[name] = (rates[-1] - rates[0]) / median
+
+def _memory(metrics, name, fn):
+    """Record the memory fn needs as <name>.peak_kb, or <name>.alloc_kb on MicroPython.
+
+    CPython's tracemalloc gives the true peak. MicroPython has no peak
+    counter, so with GC paused the total allocated is reported instead - an
+    upper bound. If that runs out of heap the metric is left out.
+    """
+    try:
+        import tracemalloc
+    except ImportError:
+        tracemalloc = None
+    if tracemalloc:
+        tracemalloc.start()
+        try:
+            fn()
+            metrics[name + ".peak_kb"] = tracemalloc.get_traced_memory()[1] / 1024
+        finally:
+            tracemalloc.stop()
+        return
+    import gc
+    gc.collect()
+    before = gc.mem_alloc()
+    gc.disable()
+    try:
+        fn()
+        metrics[name + ".alloc_kb"] = (gc.mem_alloc() - before) / 1024
+    except MemoryError:
+        print(f"{name}: heap exhausted with GC paused, try fewer --records")
+    finally:
+        gc.enable()
+        gc.collect()
+
+def _real_i2c():
+    from machine import Pin, I2C
+    return I2C(0, scl=Pin(1), sda=Pin(0), freq=400000)
+
+def _display(clock, hardware):
+    lcd_simple = __import__("lcd_simple")
+    display_manager = __import__("display_manager")
+    lcd_simple.time = clock
+    display_manager.time = clock
+    i2c = CountingI2C(clock, _real_i2c() if hardware else None)
+    lcd = lcd_simple.LCD1602(i2c, 0x27)
+    return i2c, display_manager.DisplayManager(lcd)
+
+def _restore_display_time():
+    for name in ("lcd_simple", "display_manager"):
+        if name in sys.modules:
+            sys.modules[name].time = time
+
+def bench_boot(metrics, hardware, budget_ms, offline=False):
+    """Import the dashboard from scratch and time it to the first character on screen"""
+    prefix = "boot.offline." if offline else "boot."
+    for name in CORE_MODULES:
+        sys.modules.pop(name, None)
+    loaded_before = [name for name in NETWORK_MODULES if name in sys.modules]
+    fake = FakeNetwork({})
+    fake.fail = True
+    previous = None if offline else _install_network(fake)
+    clock = VirtualClock()
+    try:
+        config = __import__("config")
+        config.OFFLINE_MODE = offline
+        port_data = __import__("port_data")
+        metrics[prefix + "import_ms"] = clock.now_us() / 1000
+        _quiet()
+        port_data.SNAPSHOT_MODE = "off"
+        i2c, display = _display(clock, hardware)
+        display.next_view(port_data.generate_rotterdam_data(budget_ms))
+        metrics[prefix + "first_frame_ms"] = i2c.first_data_us / 1000
+        if offline:
+            loaded = [name for name in NETWORK_MODULES
+                      if name in sys.modules and name not in loaded_before]
+            metrics[prefix + "network_modules"] = len(loaded)
+    finally:
+        _restore_display_time()
+        if not offline:
+            _restore_network(previous)
+        # Leave a fresh, online import for the other benchmarks
+        for name in CORE_MODULES:
+            sys.modules.pop(name, None)
+
+def bench_render(metrics, hardware):
+    """I2C traffic and time for each DisplayManager view"""
+    clock = VirtualClock()
+    try:
+        i2c, display = _display(clock, hardware)
+        for view in display.views:
+            name = view.__name__
+            writes, sent, start = i2c.writes, i2c.bytes, clock.now_us()
+            view(SAMPLE_DATA)
+            metrics[f"render.{name}.i2c_bytes"] = i2c.bytes - sent
+            metrics[f"render.{name}.i2c_writes"] = i2c.writes - writes
+            metrics[f"render.{name}.ms"] = (clock.now_us() - start) / 1000
+
+        # Scrolling a long line: rate including the step delay, and the
+        # cost of one step on its own
+        text = "COSCO SHIPPING UNIVERSE BOUND FOR SINGAPORE VIA SUEZ"
+        steps = len(text) + 3 - 16 + 1
+        start, slept = clock.now_us(), clock.slept_us
+        display._print_line_scrolling(text, 1)
+        elapsed = clock.now_us() - start
+        metrics["scroll.steps_per_s"] = steps * 1000000 / elapsed
+        step_delay_us = steps * 250 * 1000
+        metrics["scroll.step_cost_ms"] = (elapsed - step_delay_us) / steps / 1000
+    finally:
+        _restore_display_time()
+
+def bench_parse(metrics, spread, records):
+    """Streaming decode and merge throughput on a large AIS payload"""
+    http_stream = __import__("http_stream")
+    ship_merge = __import__("ship_merge")
+    body = ais_fixture(records)
+    compressed = _gzip(body)
+    metrics["parse.payload_kb"] = len(body) / 1024
+
+    def parse(payload, encoding):
+        return json.load(http_stream.decompress_stream(io.BytesIO(payload), encoding))
+
+    _throughput(metrics, spread, "parse.identity.mb_per_s", len(body), lambda: parse(body, "identity"))
+    _memory(metrics, "parse.identity", lambda: parse(body, "identity"))
+
+    if compressed:
+        metrics["parse.gzip.payload_kb"] = len(compressed) / 1024
+        _throughput(metrics, spread, "parse.gzip.mb_per_s", len(body), lambda: parse(compressed, "gzip"))
+        _memory(metrics, "parse.gzip", lambda: parse(compressed, "gzip"))
+
+    # Merge the same fleet reported by two sources
+    ships = parse(body, "identity")[1]
+    _throughput(metrics, spread, "merge.records_per_s", 2 * records * 1000000,
+                lambda: ship_merge.merge_vessels([("aishub", ships), ("aisaggregator", ships)]))
+
+def bench_refresh(metrics, records, budget_ms):
+    """End-to-end refresh latency with fast, slow, failing and hanging sources"""
+    port_data = __import__("port_data")
+    _quiet()
+    port_data.SNAPSHOT_MODE = "off"
+    ais = _gzip(ais_fixture(records))
+    ais_route = (ais, {"Content-Encoding": "gzip"}) if ais else (ais_fixture(records), {})
+    fake = FakeNetwork({"open-meteo": (WEATHER_FIXTURE, {}), "aishub": ais_route})
+    previous = _install_network(fake)
+    # (scenario, delay per call in seconds, fail every call)
+    scenarios = (
+        ("fast", 0, False),
+        ("slow", budget_ms / 4000, False),
+        ("failing", 0, True),
+        ("hanging", budget_ms / 100, False)
+    )
+    try:
+        port_data._last_good.clear()
+        for name, delay_s, fail in scenarios:
+            fake.delay_s, fake.fail, fake.calls = delay_s, fail, 0
+            start = _ticks_us()
+            data = port_data.generate_rotterdam_data(budget_ms)
+            metrics[f"refresh.{name}.ms"] = _ticks_diff(_ticks_us(), start) / 1000
+            metrics[f"refresh.{name}.calls"] = fake.calls
+            present = 0
+            for age in data["freshness"].values():
+                if age is not None:
+                    present += 1
+            metrics[f"refresh.{name}.real_fields"] = present
+    finally:
+        _restore_network(previous)
+
+def _higher_is_better(name):
+    return name.endswith("_per_s") or name.endswith("real_fields")
+
+def compare(results, baseline, tolerance=TOLERANCE):
+    """Return (metric, baseline, value, relative change) for every regression.
+
+    Throughput metrics are allowed the spread of both runs on top of the
+    tolerance. Any increase from a zero baseline is a regression; its
+    relative change is None.
+    """
+    regressions = []
+    spread = results.get("spread", {})
+    base_spread = baseline.get("spread", {})
+    for name, base in baseline["metrics"].items():
+        value = results["metrics"].get(name)
+        if value is None:
+            continue
+        if name.endswith("ms") and abs(value - base) < NOISE_MS:
+            continue
+        if not base:
+            # Nothing to scale by: e.g. network modules loaded by an offline boot
+            if value > 0 and not _higher_is_better(name):
+                regressions.append((name, base, value, None))
+            continue
+        change = (value - base) / base
+        if _higher_is_better(name):
+            change = -change
+        limit = tolerance + spread.get(name, 0) + base_spread.get(name, 0)
+        if change > limit:
+            regressions.append((name, base, value, change))
+    return regressions
+
+def _dumps(results):
+    try:
+        return json.dumps(results, indent=2, sort_keys=True)
+    except TypeError:  # MicroPython json has no formatting options
+        return json.dumps(results)
+
+def run(output=DEFAULT_OUTPUT, baseline=DEFAULT_BASELINE, save_baseline=False,
+        records=None, budget_ms=1000, hardware=False):
+    """Run every benchmark, write the results and compare them with the baseline"""
+    on_host = sys.implementation.name != "micropython"
+    if records is None:
+        # The Pico heap cannot hold the host-sized payload
+        records = 2000 if on_host else 150
+    if not hardware:
+        _emulate_machine()
+
+    metrics = {}
+    spread = {}
+    bench_boot(metrics, hardware, budget_ms, offline=True)
+    bench_boot(metrics, hardware, budget_ms)
+    bench_render(metrics, hardware)
+    bench_parse(metrics, spread, records)
+    bench_refresh(metrics, records, budget_ms)
+
+    for name in metrics:
+        metrics[name] = round(metrics[name], 3)
+    for name in spread:
+        spread[name] = round(spread[name], 3)
+    results = {
+        "implementation": sys.implementation.name,
+        "platform": sys.platform,
+        "emulated": not hardware,
+        "records": records,
+        "budget_ms": budget_ms,
+        "metrics": metrics,
+        "spread": spread
+    }
+
+    for name in sorted(metrics):
+        print(f"{name:40} {metrics[name]}")
+    with open(output, "w") as f:
+        f.write(_dumps(results))
+    print(f"Results written to {output}")
+
+    if save_baseline:
+        with open(baseline, "w") as f:
+            f.write(_dumps(results))
+        print(f"Baseline saved to {baseline}")
+        return []
+
+    try:
+        with open(baseline) as f:
+            stored = json.load(f)
+    except OSError:
+        print(f"No baseline at {baseline} (use --save-baseline)")
+        return []
+    if stored.get("implementation") != results["implementation"] or stored.get("emulated") != results["emulated"]:
+        print("⚠ Baseline was recorded on a different setup, timings may not compare")
+    regressions = []
+    for regression in compare(results, stored):
+        name, base, value, change = regression
+        detail = "from zero" if change is None else f"{change * 100:+.0f}%"
+        if on_host and name.endswith("_per_s"):
+            # CPU throughput on a shared host swings too much to gate on
+            print(f"ℹ {name}: {base} -> {value} ({detail}, informational on host)")
+        else:
+            print(f"❌ {name}: {base} -> {value} ({detail})")
+            regressions.append(regression)
+    if not regressions:
+        print("✅ No regressions against baseline")
+    return regressions
+
+def _parse_args(argv):
+    options = {}
+    i = 0
+    while i < len(argv):
+        arg = argv[i]
+        if arg in ("--output", "--baseline"):
+            options[arg[2:]] = argv[i + 1]
+            i += 1
+        elif arg in ("--records", "--budget-ms"):
+            options[arg[2:].replace("-", "_")] = int(argv[i + 1])
+            i += 1
+        elif arg in ("--save-baseline", "--hardware"):
+            options[arg[2:].replace("-", "_")] = True
+        else:
+            raise ValueError(f"Unknown option: {arg}")
+        i += 1
+    return options
+
+if __name__ == "__main__":
+    if run(**_parse_args(sys.argv[1:])):
+        sys.exit(1)
@@ -2,3 +2,21 @@
 LCD_I2C_ADDRESS = 0x27
 BUTTON_PIN = 14
 ROTTERDAM_COORDS = (51.9225, 4.47917)
+
+# Snapshot sharing between displays
+# "off"    - fetch from the internet as usual
+# "server" - fetch from the internet and serve the snapshot to other displays
+# "client" - poll the snapshot server below instead of the internet
+SNAPSHOT_MODE = "off"
+SNAPSHOT_SERVER_HOST = "192.168.1.50"
+SNAPSHOT_PORT = 8080
+SNAPSHOT_REFRESH_S = 30  # Host server refresh interval
+
+# Refresh cycle time budget shared by all source calls
+REFRESH_BUDGET_MS = 3000
+FRESH_FOR_S = 60     # Real data younger than this shows "R", older shows "~"
+MAX_STALE_S = 3600   # Real data older than this is dropped for simulation
+
+# Simulation-only build: no WiFi and no network stack is ever imported.
+# Use this on a plain Pico or for offline deployments.
+OFFLINE_MODE = False
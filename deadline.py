@@ -0,0 +1,34 @@
+# deadline.py - Time budget shared by every source call in a refresh cycle
+import time
+
+try:
+    ticks_ms = time.ticks_ms
+    ticks_diff = time.ticks_diff
+except AttributeError:  # Host (CPython)
+    def ticks_ms():
+        return int(time.monotonic() * 1000)
+
+    def ticks_diff(a, b):
+        return a - b
+
+# Calls need at least this much of the budget left to be worth starting
+MIN_CALL_MS = 200
+
+class Deadline:
+    def __init__(self, budget_ms):
+        self.budget_ms = budget_ms
+        self.start = ticks_ms()
+
+    def elapsed_ms(self):
+        return ticks_diff(ticks_ms(), self.start)
+
+    def remaining_ms(self):
+        return max(0, self.budget_ms - self.elapsed_ms())
+
+    def expired(self):
+        """True once there is not enough budget left to start another call"""
+        return self.remaining_ms() < MIN_CALL_MS
+
+    def timeout(self, max_s):
+        """Timeout in seconds for the next call: the time left, capped at max_s"""
+        return min(max_s, self.remaining_ms() / 1000)
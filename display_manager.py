@@ -1,11 +1,14 @@
 # display_manager.py - Display functions
 import time
+from config import FRESH_FOR_S
 
 LCD_COLS = 16
 
 class DisplayManager:
-    def __init__(self, lcd):
+    def __init__(self, lcd, wait_ms=None):
         self.lcd = lcd
+        # Called instead of sleeping, e.g. to answer snapshot requests
+        self.wait_ms = wait_ms
         self.current_view = 0
         self.views = [
             self.show_overview,
@@ -27,7 +30,7 @@ class DisplayManager:
             while len(text) < LCD_COLS:
                 text += " "
             self.lcd.print(text)
-            time.sleep_ms(dwell_ms)
+            self._wait(dwell_ms)
             return
         scroll_text = text + "   "
         steps = len(scroll_text) - LCD_COLS + 1
@@ -35,15 +38,35 @@ class DisplayManager:
             self.lcd.set_cursor(0, row)
             window = scroll_text[i:i + LCD_COLS]
             self.lcd.print(window)
-            time.sleep_ms(step_ms)
+            self._wait(step_ms)
+
+    def _wait(self, ms):
+        if self.wait_ms:
+            self.wait_ms(ms)
+        else:
+            time.sleep_ms(ms)
 
     def clear(self):
         self.lcd.clear()
 
-    def _show_data_source_indicator(self, data):
-        """Show data source indicator in top-right corner"""
-        source = data.get('data_source', 'SIM')
-        indicator = "R" if source == "REAL" else "S"
+    def _show_data_source_indicator(self, data, field="ships"):
+        """Show data source indicator in top-right corner.
+
+        "R" is real data, "~" is real data that could not be refreshed
+        recently and "S" is simulation.
+        """
+        freshness = data.get('freshness')
+        if freshness is None:
+            source = data.get('data_source', 'SIM')
+            indicator = "R" if source == "REAL" else "S"
+        else:
+            age = freshness.get(field)
+            if age is None:
+                indicator = "S"
+            elif age <= FRESH_FOR_S:
+                indicator = "R"
+            else:
+                indicator = "~"
         self.lcd.set_cursor(15, 0)
         self.lcd.print(indicator)
 
@@ -63,7 +86,7 @@ class DisplayManager:
         self.clear()
         self.lcd.print("LIVE WEATHER")
         self._print_line_scrolling(f"{data['weather']}", 1)
-        self._show_data_source_indicator(data)
+        self._show_data_source_indicator(data, "weather")
 
     def show_largest_ship(self, data):
         self.clear()
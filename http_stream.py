@@ -0,0 +1,131 @@
+# http_stream.py - Compressed HTTP fetches with streaming decompression
+import io
+import json
+
+try:
+    import deflate  # MicroPython
+except ImportError:
+    deflate = None
+    import zlib  # Host (CPython)
+
+ACCEPT_ENCODING = "gzip, deflate"
+CHUNK_SIZE = 512
+
+class ZlibReader:
+    """Host stand-in for deflate.DeflateIO, built on zlib.decompressobj"""
+
+    def __init__(self, stream, wbits):
+        self._stream = stream
+        self._decomp = zlib.decompressobj(wbits)
+        self._buf = b""
+        self._eof = False
+
+    def _fill(self, size):
+        while len(self._buf) < size and not self._eof:
+            chunk = self._decomp.unconsumed_tail
+            if not chunk:
+                chunk = self._stream.read(CHUNK_SIZE)
+                if not chunk:
+                    self._buf += self._decomp.flush()
+                    self._eof = True
+                    break
+            # Cap the output per step so a highly compressed chunk
+            # cannot expand into one huge buffer
+            self._buf += self._decomp.decompress(chunk, CHUNK_SIZE)
+            if self._decomp.eof:
+                self._eof = True
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            parts = []
+            while True:
+                part = self.read(CHUNK_SIZE)
+                if not part:
+                    return b"".join(parts)
+                parts.append(part)
+        self._fill(size)
+        data, self._buf = self._buf[:size], self._buf[size:]
+        return data
+
+class DeadlineReader(io.IOBase):
+    """Reads a response body until a refresh deadline runs out.
+
+    Socket timeouts only limit each recv, so a source trickling its body
+    could keep a refresh going for many times its budget. This checks the
+    deadline before every chunk and raises ETIMEDOUT once it has passed.
+    """
+
+    def __init__(self, stream, deadline):
+        self._stream = stream
+        self._deadline = deadline
+        self._buf = b""
+        self._pos = 0
+
+    def _fill(self):
+        if self._pos >= len(self._buf):
+            if self._deadline.remaining_ms() == 0:
+                raise OSError(110)  # ETIMEDOUT
+            self._buf = self._stream.read(CHUNK_SIZE) or b""
+            self._pos = 0
+
+    def readinto(self, buf):
+        # MicroPython's json.load and DeflateIO read through this
+        self._fill()
+        n = min(len(buf), len(self._buf) - self._pos)
+        buf[:n] = self._buf[self._pos:self._pos + n]
+        self._pos += n
+        return n
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            parts = []
+            while True:
+                part = self.read(CHUNK_SIZE)
+                if not part:
+                    return b"".join(parts)
+                parts.append(part)
+        self._fill()
+        data = self._buf[self._pos:self._pos + size]
+        self._pos += len(data)
+        return data
+
+def decompress_stream(stream, encoding):
+    """Wrap stream so reads return the decoded body for a Content-Encoding"""
+    encoding = (encoding or "").strip().lower()
+    if encoding in ("", "identity"):
+        return stream
+    if encoding not in ("gzip", "deflate"):
+        raise ValueError(f"Unsupported Content-Encoding: {encoding}")
+    gzip = encoding == "gzip"
+    if deflate:
+        return deflate.DeflateIO(stream, deflate.GZIP if gzip else deflate.AUTO)
+    # wbits 31 = gzip only, 47 = auto-detect zlib or gzip header
+    return ZlibReader(stream, 31 if gzip else 47)
+
+def _header(response, name):
+    name = name.lower()
+    for key, value in response.headers.items():
+        if key.lower() == name:
+            return value
+    return None
+
+def get_json(url, timeout, deadline=None):
+    """GET url and parse its JSON body as it streams off the socket.
+
+    Neither the compressed nor the decompressed body is held in full on
+    the device: json.load pulls bytes through the decompressor straight
+    from the socket. With a deadline, reading stops once it has passed.
+    Returns (status_code, data) - data is None unless the status is 200.
+    """
+    import urequests
+    response = urequests.get(url, headers={"Accept-Encoding": ACCEPT_ENCODING}, timeout=timeout)
+    try:
+        if response.status_code != 200:
+            return response.status_code, None
+        raw = response.raw
+        if deadline is not None:
+            raw = DeadlineReader(raw, deadline)
+        body = decompress_stream(raw, _header(response, "Content-Encoding"))
+        return 200, json.load(body)
+    finally:
+        response.close()
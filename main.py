@@ -1,11 +1,14 @@
 # main.py - Consolidated Rotterdam Port Dashboard
 from machine import Pin, I2C
 import time
-import network
 from lcd_simple import LCD1602
 from display_manager import DisplayManager
 from port_data import generate_rotterdam_data
-from config import LCD_I2C_ADDRESS, BUTTON_PIN
+from config import LCD_I2C_ADDRESS, BUTTON_PIN, SNAPSHOT_MODE, OFFLINE_MODE
+
+if SNAPSHOT_MODE == "server":
+    import port_data
+    import snapshot
 
 # WiFi Configuration - UPDATE THESE!
 WIFI_SSID = "Hyperoptic Fibre B413"
@@ -14,6 +17,8 @@ WIFI_PASSWORD = "uJejL8X4MeafaK"
 def connect_wifi():
     """Connect to WiFi network"""
     try:
+        # Imported here so offline builds never load the network stack
+        import network
         wlan = network.WLAN(network.STA_IF)
         wlan.active(True)
 
@@ -55,24 +60,40 @@ def get_display_data():
 AUTO_ADVANCE_MS = 5000  # Auto-advance every 5 seconds
 DEBOUNCE_MS = 250       # Debounce button presses
 
-# Connect to WiFi first
-wifi_connected = connect_wifi()
+# Connect to WiFi first (unless this is a simulation-only build)
+wifi_connected = False if OFFLINE_MODE else connect_wifi()
 
 # Initialize hardware
 i2c = I2C(0, scl=Pin(1), sda=Pin(0), freq=400000)
 lcd = LCD1602(i2c, LCD_I2C_ADDRESS)
 button = Pin(BUTTON_PIN, Pin.IN, Pin.PULL_UP)
 
+# Serve snapshots from this loop instead of a second core: the dashboard
+# answers requests whenever it waits, so all socket use stays on one core
+server = None
+wait_ms = time.sleep_ms
+if SNAPSHOT_MODE == "server":
+    server = snapshot.SnapshotServer()
+    wait_ms = server.poll
+
 # Initialize display manager and data
-display = DisplayManager(lcd)
+display = DisplayManager(lcd, wait_ms)
 current_data = get_display_data()
+if server:
+    snapshot.publish(current_data, port_data.inputs_key)
 
 print("Rotterdam Port Display Ready!")
-if wifi_connected:
+if OFFLINE_MODE:
+    print("📴 Offline build - Using simulation mode")
+elif wifi_connected:
     print("🌐 WiFi connected - Real-time data available!")
 else:
     print("📶 No WiFi - Using simulation mode")
     print("   To enable real-time data: Update WIFI_SSID and WIFI_PASSWORD")
+if SNAPSHOT_MODE == "server":
+    print("📡 Sharing snapshots with other displays")
+elif SNAPSHOT_MODE == "client":
+    print("📡 Using snapshots from the local server")
 print("Auto-advancing through 7 views every 5 seconds (or press button)")
 display.next_view(current_data)
 
@@ -90,8 +111,9 @@ def on_button(pin):
 
 button.irq(trigger=Pin.IRQ_FALLING, handler=on_button)
 
-# Main loop with auto-advance
-while True:
+def poll_views():
+    """Advance the view when the button was pressed or the auto-advance is due"""
+    global button_pressed_flag, last_auto_ms, current_data
     now = time.ticks_ms()
     auto_due = time.ticks_diff(now, last_auto_ms) >= AUTO_ADVANCE_MS
 
@@ -99,8 +121,13 @@ while True:
         button_pressed_flag = False
         last_auto_ms = now
         current_data = get_display_data()
+        if server:
+            snapshot.publish(current_data, port_data.inputs_key)
         display.next_view(current_data)
         source_indicator = "REAL" if current_data.get('data_source') == "REAL" else "SIMULATION"
         print(f"Advanced at {current_data['timestamp']} [{source_indicator}]")
 
-    time.sleep(0.05)
+# Main loop with auto-advance
+while True:
+    poll_views()
+    wait_ms(50)
@@ -0,0 +1,26 @@
+# manifest.py - Freeze the dashboard into MicroPython firmware
+#
+# Build from the MicroPython rp2 port, for example:
+#   make BOARD=RPI_PICO_W FROZEN_MANIFEST=/path/to/manifest.py
+#
+# Frozen modules run straight from flash: they import without compiling and
+# their bytecode takes no RAM. config.py and main.py are left out so they
+# can still be edited on the device.
+#
+# sys.path searches the filesystem ('') before '.frozen', so delete any .py
+# or .mpy copies of these modules from the Pico or they replace the frozen ones.
+
+# Board defaults (on a Pico W this brings in network and urequests)
+include("$(BOARD_DIR)/manifest.py")
+
+# Display and simulation core - all an offline dashboard imports
+module("lcd_simple.py", opt=3)
+module("display_manager.py", opt=3)
+module("port_sim.py", opt=3)
+module("port_data.py", opt=3)
+module("deadline.py", opt=3)
+
+# Network sources - only imported once a networked source is configured
+module("http_stream.py", opt=3)
+module("ship_merge.py", opt=3)
+module("snapshot.py", opt=3)
@@ -1,18 +1,50 @@
 # port_data.py - Rotterdam port data
-import urequests
-import random
-import time
-
-def get_real_weather():
-    """Get real weather data for Rotterdam"""
+#
+# Network modules (urequests, http_stream, ship_merge, snapshot) are imported
+# inside the functions that need them, so an offline dashboard never loads
+# the network or TLS stack.
+from deadline import Deadline, ticks_ms, ticks_diff
+from port_sim import SIMULATED_WEATHER, build_rotterdam_data
+from config import (OFFLINE_MODE, SNAPSHOT_MODE, SNAPSHOT_SERVER_HOST, SNAPSHOT_PORT,
+                    REFRESH_BUDGET_MS, FRESH_FOR_S, MAX_STALE_S)
+
+WEATHER_URL = "https://api.open-meteo.com/v1/forecast?latitude=51.92&longitude=4.48&current=temperature_2m,weather_code,wind_speed_10m"
+
+# JSON ship sources: (source name, label, url, max timeout in seconds)
+SHIP_SOURCES = [
+    ("vesselfinder", "VesselFinder", "https://www.vesselfinder.com/api/pub/vesselsonmap", 15),
+    # AIS Hub public feed (they have free access)
+    ("aishub", "AIS Hub", "https://data.aishub.net/ws.php?username=demo&format=1&output=json&compress=0", 15),
+    ("fleetmon", "FleetMon", "https://www.fleetmon.com/api/v1/vessels?limit=5&port=rotterdam", 15),
+    ("myshiptracking", "MyShipTracking", "https://www.myshiptracking.com/api/v1/vessels?port=rotterdam&limit=5", 15),
+    # A public AIS data repository
+    ("shippeo", "Shippeo", "https://api.shippeo.com/v1/public/vessels?port=NLRTM&limit=5", 10),
+    ("aisaggregator", "AIS aggregator", "https://ais.marinevesseltraffic.com/api/v1/vessels?bbox=4.2,51.7,4.7,52.1", 10)
+]
+
+# SHIP_SOURCES in the order the next refresh tries them. Sources that failed
+# move to the back, so a slow one cannot starve those after it.
+_source_order = list(SHIP_SOURCES)
+
+# Last snapshot received from the local server, reused on 304 Not Modified
+_snapshot_etag = None
+_snapshot_data = None
+_snapshot_ticks = 0
+
+# Last good value of each live field as (value, ticks_ms when fetched)
+_last_good = {}
+
+# Identifies the real inputs behind the last generated data. Everything
+# else in the data is simulated, so the snapshot server only republishes
+# (and changes its ETag) when this changes.
+inputs_key = None
+
+def _fetch_weather(timeout, deadline=None):
+    """Fetch current Rotterdam weather from Open-Meteo, or None on failure"""
+    from http_stream import get_json
     try:
-        # Try Open-Meteo first (most reliable)
-        url = "https://api.open-meteo.com/v1/forecast?latitude=51.92&longitude=4.48&current=temperature_2m,weather_code,wind_speed_10m"
-        response = urequests.get(url, timeout=8)
-        if response.status_code == 200:
-            data = response.json()
-            response.close()
-
+        status, data = get_json(WEATHER_URL, timeout, deadline)
+        if status == 200:
             weather_codes = {
                 0: "Clear", 1: "MainlyClear", 2: "PartlyCldy", 3: "Overcast",
                 45: "Fog", 48: "Fog", 51: "Drizzle", 61: "Rain",
@@ -28,273 +60,239 @@ def get_real_weather():
                 "condition": weather_desc,
                 "wind_speed": f"{current['wind_speed_10m']} km/h"
             }
-        response.close()
+        print(f"Open-Meteo HTTP error: {status}")
     except Exception as e:
         print(f"Open-Meteo failed: {e}")
+    return None
+
+def get_real_weather():
+    """Get real weather data for Rotterdam"""
+    if OFFLINE_MODE:
+        return SIMULATED_WEATHER
+    weather = _fetch_weather(8)
+    if weather:
+        return weather
 
     # Fallback to simulation if weather API fails
     print("Using simulated weather data")
-    return {"temperature": "15°C", "condition": "Cloudy", "wind_speed": "18 km/h"}
-
-def get_real_ship_data():
-    """Try to fetch real ship data from multiple public sources"""
-
-    # Skip connectivity tests - weather API already proves network works
-    print("Network connectivity confirmed via weather API")
-
-    # Skip MarineTraffic - returns 403 (access denied)
-    print("Skipping MarineTraffic (requires paid subscription)")
-
-    # Try VesselFinder public API
+    return SIMULATED_WEATHER
+
+def in_rotterdam_area(vessel):
+    """True if the vessel has no position or lies in the Rotterdam area"""
+    if vessel["lat"] is None or vessel["lon"] is None:
+        return True
+    # Rotterdam area bounds (expanded)
+    return 51.7 <= vessel["lat"] <= 52.1 and 4.2 <= vessel["lon"] <= 4.7
+
+def _fetch_ship_source(label, url, timeout, deadline=None):
+    """Fetch one JSON ship source, returning its list of records or None"""
+    from http_stream import get_json
     try:
-        print("Trying VesselFinder...")
-        url = "https://www.vesselfinder.com/api/pub/vesselsonmap"
-        response = urequests.get(url, timeout=15)
-        if response.status_code == 200:
-            data = response.json()
-            response.close()
-            if data:
-                print("Got VesselFinder data")
-                return data[:5] if isinstance(data, list) else [{"name": "VESSEL_FINDER_DATA"}]
-        response.close()
+        print(f"Trying {label}...")
+        status, data = get_json(url, timeout, deadline)
+        if status != 200:
+            print(f"{label} HTTP error: {status}")
+            return None
+        # AIS Hub wraps the records as [header, [records...]]
+        if isinstance(data, list) and len(data) == 2 and isinstance(data[1], list):
+            data = data[1]
+        if not data:
+            return None
+        if not isinstance(data, list):
+            # Only real vessel records go into the merge
+            print(f"{label} returned no vessel list")
+            return None
+        print(f"Got {len(data)} records from {label}")
+        return data
     except Exception as e:
-        print(f"VesselFinder failed: {e}")
+        print(f"{label} failed: {e}")
+        return None
+
+def _fetch_demo_ships(deadline):
+    """Last resort: a demo API that we know works - this proves the system works"""
+    from http_stream import get_json
+    from ship_merge import merge_vessels
+    print("Trying demo API (proof of concept)...")
+    # Try multiple reliable demo APIs
+    demo_apis = [
+        "https://jsonplaceholder.typicode.com/posts/1",
+        "https://api.github.com/users/octocat",
+        "https://httpbin.org/json"
+    ]
 
-    # Try a demo API that we know works - this proves the system works
-    try:
-        print("Trying demo API (proof of concept)...")
-        # Try multiple reliable demo APIs
-        demo_apis = [
-            "https://jsonplaceholder.typicode.com/posts/1",
-            "https://api.github.com/users/octocat",
-            "https://httpbin.org/json"
-        ]
-
-        for demo_url in demo_apis:
-            try:
-                response = urequests.get(demo_url, timeout=15)
-                if response.status_code == 200:
-                    data = response.json()
-                    response.close()
-                    print("✅ Demo API works! Network connectivity confirmed.")
-                    print(f"   Using {demo_url.split('/')[-1]} for connection test")
-                    # Return some sample Rotterdam ship data to prove the system works
-                    return [
-                        {"name": "DEMO_MSC_GULSUN", "type": "Container Ship", "flag": "Panama"},
-                        {"name": "DEMO_MAERSK_MCKINNEY", "type": "Container Ship", "flag": "Denmark"},
-                        {"name": "DEMO_CMA_CGM_JACQUES", "type": "Container Ship", "flag": "France"}
-                    ]
-                response.close()
-            except Exception as api_error:
-                print(f"   Demo API {demo_url.split('/')[-1]} failed: {api_error}")
-                continue
-
-        print("❌ All demo APIs failed")
-    except Exception as e:
-        print(f"Demo API system failed: {e}")
+    for demo_url in demo_apis:
+        if deadline.expired():
+            break
+        try:
+            status, data = get_json(demo_url, deadline.timeout(15), deadline)
+            if status == 200:
+                print("✅ Demo API works! Network connectivity confirmed.")
+                print(f"   Using {demo_url.split('/')[-1]} for connection test")
+                # Return some sample Rotterdam ship data to prove the system works
+                return merge_vessels([("demo", [
+                    {"name": "DEMO_MSC_GULSUN", "type": "Container Ship", "flag": "Panama"},
+                    {"name": "DEMO_MAERSK_MCKINNEY", "type": "Container Ship", "flag": "Denmark"},
+                    {"name": "DEMO_CMA_CGM_JACQUES", "type": "Container Ship", "flag": "France"}
+                ])])
+        except Exception as api_error:
+            print(f"   Demo API {demo_url.split('/')[-1]} failed: {api_error}")
+
+    print("❌ All demo APIs failed")
+    return None
 
-    # Try AIS Hub public feed (they have free access)
-    try:
-        print("Trying AIS Hub...")
-        url = "https://data.aishub.net/ws.php?username=demo&format=1&output=json&compress=0"
-        response = urequests.get(url, timeout=15)
-        print(f"AIS Hub status: {response.status_code}")
-        if response.status_code == 200:
-            try:
-                data = response.json()
-                response.close()
-                print(f"AIS Hub response: {type(data)}, length: {len(data) if hasattr(data, '__len__') else 'N/A'}")
-                if data and len(data) > 0:
-                    # Filter for Rotterdam area (approx lat/lon)
-                    rotterdam_ships = []
-                    for ship in data[:20]:  # Check first 20 ships
-                        try:
-                            if 'lat' in ship and 'lon' in ship:
-                                lat, lon = float(ship['lat']), float(ship['lon'])
-                                # Rotterdam area bounds (expanded)
-                                if 51.7 <= lat <= 52.1 and 4.2 <= lon <= 4.7:
-                                    rotterdam_ships.append(ship)
-                        except (ValueError, TypeError):
-                            continue
-                    if rotterdam_ships:
-                        print(f"✅ Got {len(rotterdam_ships)} AIS ships in Rotterdam area!")
-                        return rotterdam_ships[:5]
-                    else:
-                        print("❌ No ships found in Rotterdam area from AIS Hub")
-            except Exception as json_error:
-                content = response.text
-                response.close()
-                print(f"AIS Hub returned non-JSON: {len(content)} chars")
-                print(f"Preview: {content[:100]}...")
-                return None
-        else:
-            print(f"❌ AIS Hub HTTP error: {response.status_code}")
-        response.close()
-    except Exception as e:
-        print(f"❌ AIS Hub failed: {e}")
+def get_real_ship_data(deadline=None):
+    """Fetch ship data from every public source and merge it into one vessel list.
 
-    # Try direct Port of Rotterdam data (if available)
-    try:
-        print("Trying Port of Rotterdam data...")
-        # Check if they have any public API endpoints
-        url = "https://www.portofrotterdam.com/en/shipping/vessel-information"
-        response = urequests.get(url, timeout=10)
-        if response.status_code == 200:
-            content = response.text
-            response.close()
-            # Look for vessel data in the page content
-            if 'vessel' in content.lower() or 'ship' in content.lower():
-                print("Found vessel data on Port of Rotterdam website")
-                return [{"name": "PORT_ROTTERDAM_DATA", "source": "PortAuthority"}]
-        response.close()
-    except Exception as e:
-        print(f"Port of Rotterdam data failed: {e}")
+    Each source only gets the time left on the deadline; once it runs out the
+    vessels merged so far are returned. Sources skipped for lack of time are
+    tried before failed ones next cycle.
+    """
+    if deadline is None:
+        deadline = Deadline(REFRESH_BUDGET_MS)
 
-    # Try FleetMon public API
-    try:
-        print("Trying FleetMon...")
-        url = "https://www.fleetmon.com/api/v1/vessels?limit=5&port=rotterdam"
-        response = urequests.get(url, timeout=15)
-        if response.status_code == 200:
-            data = response.json()
-            response.close()
-            if data:
-                print("Got FleetMon data")
-                return data[:5] if isinstance(data, list) else [{"name": "FLEETMON_DATA"}]
-        response.close()
-    except Exception as e:
-        print(f"FleetMon failed: {e}")
+    # Skip connectivity tests - weather API already proves network works
+    # Skip MarineTraffic - returns 403 (access denied, requires paid subscription)
+
+    # (source name, records) for every source that answered
+    sources = []
+    answered, skipped, failed = [], [], []
+    for source in _source_order:
+        name, label, url, max_timeout = source
+        if deadline.expired():
+            skipped.append(source)
+            continue
+        records = _fetch_ship_source(label, url, deadline.timeout(max_timeout), deadline)
+        if records:
+            sources.append((name, records))
+            answered.append(source)
+        else:
+            failed.append(source)
+    if skipped:
+        print(f"⏱ Refresh budget used up, skipped {', '.join(s[1] for s in skipped)}")
+    _source_order[:] = answered + skipped + failed
+
+    from ship_merge import merge_vessels
+    vessels = [v for v in merge_vessels(sources) if in_rotterdam_area(v)]
+    if vessels:
+        print(f"✅ Merged {len(vessels)} vessels from {len(sources)} sources")
+        return vessels
+
+    if not deadline.expired():
+        vessels = _fetch_demo_ships(deadline)
+        if vessels:
+            return vessels
+
+    print("No real-time ship data this cycle")
+    print("💡 TIP: Real maritime APIs often require authentication/subscription")
+    return None
 
-    # Try MyShipTracking
+def _with_freshness(field, value):
+    """Return (value, age in seconds) for a live field.
+
+    A new value is cached and has age 0; a missing one falls back to the last
+    good value if it is no older than MAX_STALE_S. (None, None) means there is
+    no real data and the field should be simulated.
+    """
+    now = ticks_ms()
+    if value:
+        _last_good[field] = (value, now)
+        return value, 0
+    if field in _last_good:
+        cached, fetched = _last_good[field]
+        # Never negative, even if the ticks counter misbehaves
+        age = max(0, ticks_diff(now, fetched) // 1000)
+        if age <= MAX_STALE_S:
+            print(f"Using {field} from {age}s ago")
+            return cached, age
+        # Drop it for good - ticks_diff wraps after ~6 days on the Pico,
+        # which would make a very old value look fresh again
+        del _last_good[field]
+    return None, None
+
+def _freshness_bucket(age):
+    # What the display shows for an age: None (simulated), True ("R") or False ("~")
+    return None if age is None else age <= FRESH_FOR_S
+
+def get_snapshot_data(deadline=None):
+    """Poll the local snapshot server instead of the upstream APIs"""
+    global _snapshot_etag, _snapshot_data, _snapshot_ticks
+    import urequests
+    import snapshot
+    if deadline is None:
+        deadline = Deadline(REFRESH_BUDGET_MS)
+    url = f"http://{SNAPSHOT_SERVER_HOST}:{SNAPSHOT_PORT}{snapshot.SNAPSHOT_PATH}"
+    headers = {}
+    if _snapshot_etag:
+        headers["If-None-Match"] = _snapshot_etag
     try:
-        print("Trying MyShipTracking...")
-        url = "https://www.myshiptracking.com/api/v1/vessels?port=rotterdam&limit=5"
-        response = urequests.get(url, timeout=15)
-        if response.status_code == 200:
-            data = response.json()
+        response = urequests.get(url, headers=headers, timeout=deadline.timeout(5))
+        if response.status_code == 304:
             response.close()
-            if data:
-                print("Got MyShipTracking data")
-                return data[:5] if isinstance(data, list) else [{"name": "MYSHIP_DATA"}]
-        response.close()
-    except Exception as e:
-        print(f"MyShipTracking failed: {e}")
-
-    # Last resort: Try some alternative free maritime data sources
-    try:
-        print("Trying alternative maritime sources...")
-        # Try a public AIS data repository
-        url = "https://api.shippeo.com/v1/public/vessels?port=NLRTM&limit=5"
-        response = urequests.get(url, timeout=10)
-        if response.status_code == 200:
-            data = response.json()
+            _snapshot_ticks = ticks_ms()
+            print("Snapshot unchanged (304)")
+        elif response.status_code == 200:
+            body = response.content
+            etag = response.headers.get("ETag")
             response.close()
-            if data:
-                print("Got Shippeo data")
-                return data[:5] if isinstance(data, list) else [{"name": "SHIPPEO_DATA"}]
-        response.close()
-    except Exception as e:
-        print(f"Shippeo failed: {e}")
-
-    # Try to get data from a free AIS aggregator
-    try:
-        print("Trying AIS aggregator...")
-        url = "https://ais.marinevesseltraffic.com/api/v1/vessels?bbox=4.2,51.7,4.7,52.1"
-        response = urequests.get(url, timeout=10)
-        if response.status_code == 200:
-            data = response.json()
+            _snapshot_data = snapshot.decode(body)
+            _snapshot_etag = etag
+            _snapshot_ticks = ticks_ms()
+            print(f"✅ Snapshot from {SNAPSHOT_SERVER_HOST} ({len(body)} bytes)")
+        else:
             response.close()
-            if data and len(data) > 0:
-                print(f"Got {len(data)} vessels from AIS aggregator")
-                return data[:5]
-        response.close()
+            print(f"Snapshot server HTTP error: {response.status_code}")
     except Exception as e:
-        print(f"AIS aggregator failed: {e}")
-
-    print("All real-time data sources failed, using simulation")
-    print("💡 TIP: Real maritime APIs often require authentication/subscription")
-    print("   The simulation provides realistic Rotterdam port data!")
-    return None
-
-
-
-def generate_rotterdam_data():
-    """Generate realistic Rotterdam port data with real weather and ship data attempts"""
-    weather = get_real_weather()
-    real_ships = get_real_ship_data()
-
-    # Determine data source
-    data_source = "REAL" if real_ships else "SIMULATION"
-
-    # Enhanced Rotterdam-specific ship data with real vessel types
-    real_rotterdam_ships = [
-        "MSC GULSUN", "MAERSK MC-KINNEY", "CMA CGM JACQUES", "EVER GIVEN",
-        "ONE APUS", "COSCO SHIPPING LEO", "MSC ZOE", "OOCL GERMANY",
-        "HMM ALGECIRAS", "NYK VEGA", "MOL TRIUMPH", "APL CHONGQING",
-        "HYUNDAI BUSAN", "SITC SHENZHEN", "WAN HAI 501", "TS SINGAPORE",
-        "MARIANNA", "ALEXANDRA", "CONTAINER SHIP", "BULK CARRIER",
-        "TANKER VESSEL", "CAR CARRIER", "REEFER SHIP", "LNG CARRIER"
-    ]
-
-    major_destinations = [
-        "SHANGHAI", "SINGAPORE", "HAMBURG", "ANTWERP", "FELIXSTOWE",
-        "ROTTERDAM", "BREMERHAVEN", "LE HAVRE", "VALENCIA", "GENOA",
-        "NEW YORK", "LOS ANGELES", "LONG BEACH", "HOUSTON", "MIAMI"
-    ]
-
-    terminals = ["MAASVLAKTE", "EUROPOORT", "BOTLEK", "WAALHAVEN", "AMSTERDAM", "VLAARDINGEN"]
-
-    # Add current time-based activity levels
-    current_time = time.localtime()
-    hour = current_time[3]
-
-    # Adjust ship counts based on time of day (business hours have more activity)
-    if 6 <= hour < 20:  # Business hours
-        base_ships = random.randint(140, 200)
-        activity_multiplier = 1.2
-    else:  # Night/off-hours
-        base_ships = random.randint(80, 130)
-        activity_multiplier = 0.8
-
-    # Use real ship names if available, otherwise use Rotterdam-specific names
-    if real_ships:
-        ship_names = []
-        for ship in real_ships:
-            # Try different possible field names for ship names
-            name = ship.get('name') or ship.get('shipname') or ship.get('vessel_name') or ship.get('ship_name')
-            if name and name != 'UNKNOWN':
-                ship_names.append(name)
-
-        if ship_names:
-            # Use real ship names, but keep some authentic Rotterdam names as backup
-            real_rotterdam_ships = ship_names[:8] + real_rotterdam_ships[:8]
-            print(f"Using {len(ship_names)} real ship names from live data")
-
-    largest_ship = random.choice(real_rotterdam_ships)
-    focus_ship = random.choice(real_rotterdam_ships)
-
-    # Calculate dynamic ship counts based on time and activity
-    inbound_count = int(random.randint(8, 25) * activity_multiplier)
-    outbound_count = int(random.randint(6, 20) * activity_multiplier)
-    anchored_count = random.randint(5, 15)
-    moored_count = base_ships - inbound_count - outbound_count - anchored_count
-
-    return {
-        "total_ships": base_ships,
-        "inbound": max(1, inbound_count),
-        "outbound": max(1, outbound_count),
-        "anchored": anchored_count,
-        "moored": max(0, moored_count),
-        "largest_ship": largest_ship,
-        "largest_dwt": random.randint(180000, 235000),
-        "focus_ship": focus_ship,
-        "focus_destination": random.choice(major_destinations),
-        "focus_status": random.choice(["MOORED", "INBOUND", "OUTBOUND", "ANCHORED"]),
-        "focus_eta": f"{random.randint(10,23)}:{random.randint(10,59):02d}",
-        "terminal": random.choice(terminals),
-        "weather": f"{weather['condition']} {weather['temperature']}",
-        "wind": weather['wind_speed'],
-        "activity_level": "HIGH" if activity_multiplier > 1.0 else "NORMAL" if hour >= 6 else "LOW",
-        "port_status": "BUSY" if base_ships > 160 else "NORMAL" if base_ships > 120 else "QUIET",
-        "data_source": data_source
-    }
+        print(f"Snapshot server failed: {e}")
+
+    if _snapshot_data:
+        data = dict(_snapshot_data)
+        # Age the server's freshness by the time since we last heard from it
+        age = max(0, ticks_diff(ticks_ms(), _snapshot_ticks) // 1000)
+        freshness = {}
+        for field, field_age in data["freshness"].items():
+            freshness[field] = None if field_age is None else field_age + age
+        if age <= MAX_STALE_S and all(a is None or a <= MAX_STALE_S for a in freshness.values()):
+            data["freshness"] = freshness
+            return data
+        # Same cutoff as the server applies to its own data
+        print(f"Snapshot is {age}s old, dropping it")
+        _snapshot_data = None
+        _snapshot_etag = None
+
+    # Never fall back to the internet - that is the server's job
+    print("No snapshot yet, using simulation")
+    return build_rotterdam_data(None, None)
+
+def generate_rotterdam_data(budget_ms=REFRESH_BUDGET_MS):
+    """Generate realistic Rotterdam port data with real weather and ship data attempts.
+
+    The whole refresh shares one time budget. Fields that could not be
+    refreshed in time keep their last good value, tagged with its age.
+    """
+    global inputs_key
+    if OFFLINE_MODE:
+        inputs_key = ("offline",)
+        return build_rotterdam_data(None, None)
+
+    deadline = Deadline(budget_ms)
+    if SNAPSHOT_MODE == "client":
+        return get_snapshot_data(deadline)
+
+    weather = None
+    if not deadline.expired():
+        weather = _fetch_weather(deadline.timeout(8), deadline)
+    weather, weather_age = _with_freshness("weather", weather)
+
+    ships = None
+    if not deadline.expired():
+        ships = get_real_ship_data(deadline)
+    ships, ships_age = _with_freshness("ships", ships)
+
+    print(f"Refresh took {deadline.elapsed_ms()}ms of {budget_ms}ms budget")
+    inputs_key = (
+        str(weather),
+        tuple(v["mmsi"] or v["imo"] or v["name"] for v in ships) if ships else None,
+        _freshness_bucket(weather_age),
+        _freshness_bucket(ships_age)
+    )
+    return build_rotterdam_data(weather, ships, {"weather": weather_age, "ships": ships_age})
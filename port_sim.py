@@ -0,0 +1,92 @@
+# port_sim.py - Simulated Rotterdam port data (no network imports)
+import random
+import time
+
+SIMULATED_WEATHER = {"temperature": "15°C", "condition": "Cloudy", "wind_speed": "18 km/h"}
+
+def build_rotterdam_data(weather, real_ships, freshness=None):
+    """Build the display data from weather and (optional) real ship records.
+
+    freshness maps "weather" and "ships" to the age of the real data in
+    seconds, or None where that field is simulated.
+    """
+    if weather is None:
+        weather = SIMULATED_WEATHER
+    if freshness is None:
+        freshness = {"weather": None, "ships": None}
+
+    # Determine data source
+    data_source = "REAL" if real_ships else "SIMULATION"
+
+    # Enhanced Rotterdam-specific ship data with real vessel types
+    real_rotterdam_ships = [
+        "MSC GULSUN", "MAERSK MC-KINNEY", "CMA CGM JACQUES", "EVER GIVEN",
+        "ONE APUS", "COSCO SHIPPING LEO", "MSC ZOE", "OOCL GERMANY",
+        "HMM ALGECIRAS", "NYK VEGA", "MOL TRIUMPH", "APL CHONGQING",
+        "HYUNDAI BUSAN", "SITC SHENZHEN", "WAN HAI 501", "TS SINGAPORE",
+        "MARIANNA", "ALEXANDRA", "CONTAINER SHIP", "BULK CARRIER",
+        "TANKER VESSEL", "CAR CARRIER", "REEFER SHIP", "LNG CARRIER"
+    ]
+
+    major_destinations = [
+        "SHANGHAI", "SINGAPORE", "HAMBURG", "ANTWERP", "FELIXSTOWE",
+        "ROTTERDAM", "BREMERHAVEN", "LE HAVRE", "VALENCIA", "GENOA",
+        "NEW YORK", "LOS ANGELES", "LONG BEACH", "HOUSTON", "MIAMI"
+    ]
+
+    terminals = ["MAASVLAKTE", "EUROPOORT", "BOTLEK", "WAALHAVEN", "AMSTERDAM", "VLAARDINGEN"]
+
+    # Add current time-based activity levels
+    current_time = time.localtime()
+    hour = current_time[3]
+
+    # Adjust ship counts based on time of day (business hours have more activity)
+    if 6 <= hour < 20:  # Business hours
+        base_ships = random.randint(140, 200)
+        activity_multiplier = 1.2
+    else:  # Night/off-hours
+        base_ships = random.randint(80, 130)
+        activity_multiplier = 0.8
+
+    # Use real ship names if available, otherwise use Rotterdam-specific names
+    if real_ships:
+        ship_names = []
+        for ship in real_ships:
+            # Merged vessel records always carry a canonical name (or None)
+            if ship["name"]:
+                ship_names.append(ship["name"])
+
+        if ship_names:
+            # Use real ship names, but keep some authentic Rotterdam names as backup
+            real_rotterdam_ships = ship_names[:8] + real_rotterdam_ships[:8]
+            print(f"Using {len(ship_names)} real ship names from live data")
+
+    largest_ship = random.choice(real_rotterdam_ships)
+    focus_ship = random.choice(real_rotterdam_ships)
+
+    # Calculate dynamic ship counts based on time and activity
+    inbound_count = int(random.randint(8, 25) * activity_multiplier)
+    outbound_count = int(random.randint(6, 20) * activity_multiplier)
+    anchored_count = random.randint(5, 15)
+    moored_count = base_ships - inbound_count - outbound_count - anchored_count
+
+    return {
+        "total_ships": base_ships,
+        "inbound": max(1, inbound_count),
+        "outbound": max(1, outbound_count),
+        "anchored": anchored_count,
+        "moored": max(0, moored_count),
+        "largest_ship": largest_ship,
+        "largest_dwt": random.randint(180000, 235000),
+        "focus_ship": focus_ship,
+        "focus_destination": random.choice(major_destinations),
+        "focus_status": random.choice(["MOORED", "INBOUND", "OUTBOUND", "ANCHORED"]),
+        "focus_eta": f"{random.randint(10,23)}:{random.randint(10,59):02d}",
+        "terminal": random.choice(terminals),
+        "weather": f"{weather['condition']} {weather['temperature']}",
+        "wind": weather['wind_speed'],
+        "activity_level": "HIGH" if activity_multiplier > 1.0 else "NORMAL" if hour >= 6 else "LOW",
+        "port_status": "BUSY" if base_ships > 160 else "NORMAL" if base_ships > 120 else "QUIET",
+        "data_source": data_source,
+        "freshness": freshness
+    }
@@ -0,0 +1,210 @@
+# ship_merge.py - Merge and deduplicate vessel records from several sources
+
+# Source field name -> canonical field. Covers the lowercase names used by
+# the JSON APIs and the uppercase names used by AIS feeds (AIS Hub).
+FIELD_ALIASES = {
+    "mmsi": "mmsi", "MMSI": "mmsi",
+    "imo": "imo", "IMO": "imo",
+    "name": "name", "shipname": "name", "vessel_name": "name", "ship_name": "name", "NAME": "name",
+    "type": "type", "ship_type": "type", "vessel_type": "type", "TYPE": "type",
+    "flag": "flag", "country": "flag", "FLAG": "flag",
+    "lat": "lat", "latitude": "lat", "LAT": "lat", "LATITUDE": "lat",
+    "lon": "lon", "lng": "lon", "longitude": "lon", "LON": "lon", "LONGITUDE": "lon",
+    "destination": "destination", "dest": "destination", "DEST": "destination", "DESTINATION": "destination",
+    "timestamp": "timestamp", "time": "timestamp", "last_update": "timestamp",
+    "TIME": "timestamp", "TIMESTAMP": "timestamp"
+}
+
+def _clean_id(value):
+    if value is None:
+        return None
+    text = str(value).strip().upper()
+    if text.startswith("IMO"):
+        text = text[3:].strip()
+    if not text.isdigit() or int(text) == 0:
+        return None
+    return str(int(text))
+
+def _clean_name(value):
+    if value is None:
+        return None
+    name = " ".join(str(value).upper().split())
+    if not name or name == "UNKNOWN":
+        return None
+    return name
+
+def _name_key(name):
+    return "".join(c for c in name if c.isalpha() or c.isdigit())
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return None
+
+def _days_from_civil(y, m, d):
+    # Days since 1970-01-01 for a proleptic Gregorian date
+    if m <= 2:
+        y -= 1
+    era = y // 400
+    yoe = y - era * 400
+    doy = (153 * (m + (-3 if m > 2 else 9)) + 2) // 5 + d - 1
+    doe = yoe * 365 + yoe // 4 - yoe // 100 + doy
+    return era * 146097 + doe - 719468
+
+def _utc_offset(text):
+    # "+02:00", "-0530" or "+02" -> seconds east of UTC
+    sign = -1 if text[0] == "-" else 1
+    digits = text[1:].replace(":", "")
+    return sign * (int(digits[:2]) * 3600 + int(digits[2:4] or "0") * 60)
+
+def to_epoch(value):
+    """Convert an epoch number or 'YYYY-MM-DD HH:MM:SS[+HH:MM]' string to UTC epoch seconds (0 if unknown)"""
+    if value is None:
+        return 0
+    if isinstance(value, (int, float)):
+        seconds = int(value)
+    else:
+        text = str(value).strip()
+        if text.isdigit():
+            seconds = int(text)
+        else:
+            try:
+                # "2024-05-08 10:45:12 GMT", "2024-05-08T10:45:12Z"
+                # or "2024-05-08T10:45:12+02:00"
+                parts = text.replace("T", " ").split()
+                date, clock = parts[0], parts[1].rstrip("Z")
+                offset = 0
+                for sign in "+-":
+                    if sign in clock:
+                        clock, zone = clock.split(sign, 1)
+                        offset = _utc_offset(sign + zone)
+                if offset == 0 and len(parts) > 2 and parts[2][0] in "+-":
+                    offset = _utc_offset(parts[2])
+                y, m, d = [int(p) for p in date.split("-")]
+                hh, mm, ss = [int(float(p)) for p in clock.split(":")]
+            except (ValueError, TypeError, IndexError):
+                return 0
+            return _days_from_civil(y, m, d) * 86400 + hh * 3600 + mm * 60 + ss - offset
+    # Some APIs report milliseconds
+    return seconds // 1000 if seconds > 10000000000 else seconds
+
+def to_canonical(raw, source):
+    """Map one source record onto the canonical vessel record, or None if unusable"""
+    if not isinstance(raw, dict):
+        return None
+    values = {}
+    for key, value in raw.items():
+        canonical = FIELD_ALIASES.get(key)
+        if canonical and values.get(canonical) is None:
+            values[canonical] = value
+
+    record = {
+        "mmsi": _clean_id(values.get("mmsi")),
+        "imo": _clean_id(values.get("imo")),
+        "name": _clean_name(values.get("name")),
+        "type": values.get("type"),
+        "flag": values.get("flag"),
+        "lat": _to_float(values.get("lat")),
+        "lon": _to_float(values.get("lon")),
+        "destination": _clean_name(values.get("destination")),
+        "timestamp": to_epoch(values.get("timestamp")),
+        "source": source
+    }
+    if not (record["mmsi"] or record["imo"] or record["name"]):
+        return None
+    return record
+
+def _id_keys(record):
+    keys = []
+    if record["mmsi"]:
+        keys.append("M:" + record["mmsi"])
+    if record["imo"]:
+        keys.append("I:" + record["imo"])
+    return keys
+
+def _combine(current, incoming):
+    # The newer record wins conflicts; the older one fills its gaps
+    if incoming["timestamp"] > current["timestamp"]:
+        older, newer = current, incoming
+    else:
+        older, newer = incoming, current
+    merged = dict(older)
+    for key, value in newer.items():
+        if value is not None:
+            merged[key] = value
+    sources = current["source"].split("+")
+    for source in incoming["source"].split("+"):
+        if source not in sources:
+            sources.append(source)
+    merged["source"] = "+".join(sources)
+    return merged
+
+def _conflicts(a, b):
+    # Different vessels only if they carry the same kind of ID with different values
+    return bool((a["mmsi"] and b["mmsi"] and a["mmsi"] != b["mmsi"]) or
+                (a["imo"] and b["imo"] and a["imo"] != b["imo"]))
+
+def _find(moved, pos):
+    # Follow entries folded into others to the one that holds them now
+    while pos in moved:
+        pos = moved[pos]
+    return pos
+
+def merge_vessels(sources):
+    """Merge (source_name, records) pairs into one deduplicated vessel list.
+
+    Vessels are matched by MMSI or IMO, or by normalized name when their IDs
+    do not conflict. A record whose IDs point at several vessels (one source
+    knew only the MMSI, another only the IMO) folds them into one. A few hash
+    index lookups per record keep this O(N).
+    """
+    vessels = []
+    index = {}  # "M:<mmsi>", "I:<imo>" or "N:<name>" -> position in vessels
+    moved = {}  # position of a vessel folded into another -> its new position
+
+    for source, records in sources:
+        for raw in records:
+            record = to_canonical(raw, source)
+            if record is None:
+                continue
+
+            matches = []
+            for key in _id_keys(record):
+                if key in index:
+                    pos = _find(moved, index[key])
+                    if pos not in matches:
+                        matches.append(pos)
+            if not matches and record["name"]:
+                # Fall back to the name unless the IDs say these are different vessels
+                candidate = index.get("N:" + _name_key(record["name"]))
+                if candidate is not None:
+                    candidate = _find(moved, candidate)
+                    if not _conflicts(vessels[candidate], record):
+                        matches.append(candidate)
+
+            if not matches:
+                pos = len(vessels)
+                vessels.append(record)
+            else:
+                # Keep the earliest position so the list stays in first-seen order
+                matches.sort()
+                pos = matches[0]
+                record = _combine(vessels[pos], record)
+                for other in matches[1:]:
+                    if _conflicts(record, vessels[other]):
+                        continue
+                    record = _combine(record, vessels[other])
+                    vessels[other] = None
+                    moved[other] = pos
+                vessels[pos] = record
+
+            for key in _id_keys(record):
+                index[key] = pos
+            if record["name"]:
+                # Names are only a fallback key, so the first vessel keeps it
+                name_key = "N:" + _name_key(record["name"])
+                if name_key not in index:
+                    index[name_key] = pos
+
+    return [v for v in vessels if v is not None]
@@ -0,0 +1,182 @@
+# snapshot.py - Share the current port snapshot with other displays
+import struct
+from config import SNAPSHOT_PORT, SNAPSHOT_REFRESH_S
+from deadline import Deadline
+
+SNAPSHOT_PATH = "/snapshot"
+CONTENT_TYPE = "application/x-port-snapshot"
+CLIENT_TIMEOUT_S = 2  # Time a client gets to send its request
+
+_MAGIC = b"PS"
+_VERSION = 2
+
+# Wire format: fields are written in this order, so only ever append
+# new fields and bump _VERSION when the layout changes
+_INT_FIELDS = ("total_ships", "inbound", "outbound", "anchored", "moored", "largest_dwt")
+_STR_FIELDS = (
+    "largest_ship", "focus_ship", "focus_destination", "focus_status",
+    "focus_eta", "terminal", "weather", "wind", "activity_level",
+    "port_status", "data_source"
+)
+_INT_FORMAT = ">" + "I" * len(_INT_FIELDS)
+_INT_SIZE = struct.calcsize(_INT_FORMAT)
+# Age in seconds of each live field, 0xFFFF when it is simulated
+_FRESHNESS_FIELDS = ("weather", "ships")
+_FRESHNESS_FORMAT = ">" + "H" * len(_FRESHNESS_FIELDS)
+_FRESHNESS_SIZE = struct.calcsize(_FRESHNESS_FORMAT)
+_NO_AGE = 0xFFFF
+
+# Latest snapshot as (body, etag)
+_current = (None, None)
+_published_key = None
+
+def _utf8_prefix(text, limit=255):
+    """UTF-8 bytes of text, cut to limit bytes without splitting a character"""
+    raw = text.encode("utf-8")
+    if len(raw) <= limit:
+        return raw
+    end = limit
+    # Back off over continuation bytes (0b10xxxxxx) to a character start
+    while end and raw[end] & 0xC0 == 0x80:
+        end -= 1
+    return raw[:end]
+
+def encode(data):
+    """Pack port data into the compact binary snapshot format"""
+    out = bytearray(_MAGIC)
+    out.append(_VERSION)
+    out += struct.pack(_INT_FORMAT, *[max(0, int(data.get(k, 0))) for k in _INT_FIELDS])
+    for key in _STR_FIELDS:
+        text = _utf8_prefix(str(data.get(key, "")))
+        out.append(len(text))
+        out += text
+    freshness = data.get("freshness") or {}
+    ages = []
+    for key in _FRESHNESS_FIELDS:
+        age = freshness.get(key)
+        ages.append(_NO_AGE if age is None else max(0, min(int(age), _NO_AGE - 1)))
+    out += struct.pack(_FRESHNESS_FORMAT, *ages)
+    return bytes(out)
+
+def decode(body):
+    """Unpack a binary snapshot back into a port data dict"""
+    if body[:2] != _MAGIC or body[2] != _VERSION:
+        raise ValueError("Unsupported snapshot format")
+    data = {}
+    values = struct.unpack(_INT_FORMAT, body[3:3 + _INT_SIZE])
+    for key, value in zip(_INT_FIELDS, values):
+        data[key] = value
+    pos = 3 + _INT_SIZE
+    for key in _STR_FIELDS:
+        length = body[pos]
+        data[key] = str(body[pos + 1:pos + 1 + length], "utf-8")
+        pos += 1 + length
+    ages = struct.unpack(_FRESHNESS_FORMAT, body[pos:pos + _FRESHNESS_SIZE])
+    data["freshness"] = {}
+    for key, age in zip(_FRESHNESS_FIELDS, ages):
+        data["freshness"][key] = None if age == _NO_AGE else age
+    return data
+
+def make_etag(body):
+    """FNV-1a hash of the body, quoted as an HTTP entity tag"""
+    h = 0x811C9DC5
+    for b in body:
+        h = ((h ^ b) * 0x01000193) & 0xFFFFFFFF
+    return '"%08x"' % h
+
+def publish(data, key=None):
+    """Make data the snapshot served to other displays.
+
+    key identifies the real inputs behind data (port_data.inputs_key). While
+    it stays the same the previous snapshot, and so its ETag, is kept.
+    """
+    global _current, _published_key
+    if key is not None and key == _published_key and _current[0] is not None:
+        return
+    body = encode(data)
+    _current = (body, make_etag(body))
+    _published_key = key
+
+def _response(status, headers, body=b""):
+    lines = [f"HTTP/1.0 {status}"]
+    for name, value in headers:
+        lines.append(f"{name}: {value}")
+    return ("\r\n".join(lines) + "\r\n\r\n").encode() + body
+
+def _reply(request_line, if_none_match):
+    """Full HTTP response to one request for the current snapshot"""
+    parts = request_line.split()
+    body, etag = _current
+    if len(parts) < 2 or parts[0] != b"GET" or parts[1] != SNAPSHOT_PATH.encode():
+        return _response("404 Not Found", [("Content-Length", 0)])
+    if body is None:
+        return _response("503 Service Unavailable", [("Content-Length", 0), ("Retry-After", 5)])
+    if if_none_match == etag:
+        return _response("304 Not Modified", [("ETag", etag)])
+    return _response("200 OK", [
+        ("Content-Type", CONTENT_TYPE),
+        ("Content-Length", len(body)),
+        ("ETag", etag),
+        ("Cache-Control", "no-cache")
+    ], body)
+
+class SnapshotServer:
+    """Serves the published snapshot from the dashboard's own loop.
+
+    There is no thread or event loop: call poll() wherever the dashboard
+    would otherwise sleep, so all socket use stays on one core. Requests
+    that arrive while it is busy fetching wait in the listen queue.
+    """
+
+    def __init__(self, host="0.0.0.0", port=SNAPSHOT_PORT):
+        import socket
+        import select
+        self._sock = socket.socket()
+        self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._sock.bind(socket.getaddrinfo(host, port)[0][-1])
+        self._sock.listen(4)
+        self._sock.setblocking(False)
+        self._poller = select.poll()
+        self._poller.register(self._sock, select.POLLIN)
+        print(f"📡 Snapshot server on port {port}")
+
+    def poll(self, wait_ms=0):
+        """Answer requests for wait_ms milliseconds, or only those already waiting"""
+        deadline = Deadline(wait_ms)
+        while self._poller.poll(deadline.remaining_ms()):
+            self._answer()
+
+    def _answer(self):
+        try:
+            conn, _ = self._sock.accept()
+        except OSError:
+            return  # Client gave up before we got to it
+        stream = None
+        try:
+            conn.settimeout(CLIENT_TIMEOUT_S)
+            stream = conn.makefile("rb")
+            request_line = stream.readline()
+            if_none_match = None
+            while True:
+                line = stream.readline()
+                if not line or line == b"\r\n":
+                    break
+                parts = line.split(b":", 1)
+                if len(parts) == 2 and parts[0].strip().lower() == b"if-none-match":
+                    if_none_match = parts[1].strip().decode()
+            conn.sendall(_reply(request_line, if_none_match))
+        except Exception as e:
+            print(f"Snapshot request failed: {e}")
+        finally:
+            if stream is not None:
+                stream.close()
+            conn.close()
+
+# Host build: fetch upstream and serve snapshots without an LCD attached.
+# The server is polled between refreshes, like on the dashboard.
+if __name__ == "__main__":
+    import port_data
+    server = SnapshotServer()
+    while True:
+        publish(port_data.generate_rotterdam_data(), port_data.inputs_key)
+        server.poll(SNAPSHOT_REFRESH_S * 1000)